@@ -1,24 +1,54 @@
-import gspread
 import asyncio
 import aiohttp
-from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
+from urllib.parse import urlparse, quote
 import pandas as pd
+from google.auth.transport.requests import AuthorizedSession
+from google.oauth2 import service_account
+import json
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from typing import List, Tuple, Optional, Dict, Any
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 import os
+import re
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to the stdlib parser
+    orjson = None
+
+try:
+    import ada_url
+except ImportError:  # ada-url is optional, fall back to urllib.parse
+    ada_url = None
+
+try:
+    from aiohttp_client_cache import CachedSession
+    # Import the concrete backend so a missing aiosqlite is caught here too
+    from aiohttp_client_cache.backends.sqlite import SQLiteBackend
+except ImportError:  # aiohttp-client-cache is optional, redirects are then only cached in memory
+    CachedSession = SQLiteBackend = None
+
+try:
+    import uvloop
+except ImportError:  # uvloop is optional and unavailable on Windows
+    uvloop = None
 
 # Create logs directory if it doesn't exist
 os.makedirs('logs', exist_ok=True)
 
-# Configure logging to both file and console
+# Handlers only enqueue records, the file and console writes happen on the
+# listener thread started in main() so fetches never block on log I/O
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+log_queue: queue.SimpleQueue = queue.SimpleQueue()
+queue_handler = QueueHandler(log_queue)
+# Only merge the message arguments here, LOG_FORMAT is applied by the listener
+queue_handler.setFormatter(logging.Formatter('%(message)s'))
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(f'logs/google_sheets_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log'),
-        logging.StreamHandler()
-    ]
+    handlers=[queue_handler]
 )
 logger = logging.getLogger(__name__)
 
@@ -39,6 +69,12 @@ SHEET_CONFIGS = {
     }
 }
 
+SHEETS_BATCH_GET_URL = 'https://sheets.googleapis.com/v4/spreadsheets/{spreadsheet_id}/values:batchGet'
+SHEETS_SCOPES = ['https://www.googleapis.com/auth/spreadsheets.readonly']
+
+# orjson parses the (large) Sheets responses much faster when installed
+json_loads = orjson.loads if orjson is not None else json.loads
+
 HEADERS: Dict[str, str] = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
     'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -46,18 +82,88 @@ HEADERS: Dict[str, str] = {
     'Connection': 'keep-alive',
 }
 
+# Ports dropped from hosts when comparing URLs
+DEFAULT_PORTS: Dict[str, int] = {'http': 80, 'https': 443}
+
+# Characters the WHATWG URL standard leaves unencoded in paths, besides alphanumerics
+_PATH_SAFE_CHARS = "!$%&'()*+,-./:;=@[\\]^_|~"
+
+# Path segments ada-url treats as '.' and '..'
+_SINGLE_DOT_SEGMENTS = frozenset({'.', '%2e'})
+_DOUBLE_DOT_SEGMENTS = frozenset({'..', '.%2e', '%2e.', '%2e%2e'})
+
+# Total time allowed per request, including redirects
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=30)
+
+# Maximum number of URLs being fetched at once
+MAX_CONCURRENT_FETCHES = 64
+
+# Log progress every this many fetched URLs
+PROGRESS_INTERVAL = 50
+
+# On-disk cache of HTTP responses, reused across runs when aiohttp-client-cache is installed
+URL_CACHE_PATH = 'logs/url_cache.sqlite'
+URL_CACHE_EXPIRE_SECONDS = 86400
+
+# Nameservers used by the aiodns resolver
+DNS_NAMESERVERS = ['1.1.1.1', '8.8.8.8']
+
+# HTTP session shared by every verification, see get_session()
+_SESSION: Optional[aiohttp.ClientSession] = None
+
+# Final URL for each URL already resolved during this run
+_URL_CACHE: Dict[str, str] = {}
+
+# Only ask for the first byte when falling back from HEAD to GET
+RANGE_HEADERS: Dict[str, str] = {'Range': 'bytes=0-0'}
+
+# Tracking parameters to remove (matched case-insensitively)
+_TRACKING_PARAMS = frozenset({
+    # UTM parameters
+    'utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content',
+    # Social media
+    'fbclid', 'gclid', '_ga', 'ref', 'source', 'campaign', 'medium',
+    # Referral parameters
+    'ref_src', 'ref_url', 'ref_map', 'ref_type', 'ref_id', 'ref_content',
+    # Additional tracking
+    '_hsenc', '_hsmi', 'mc_cid', 'mc_eid', 'ml_subscriber', 'ml_subscriber_hash',
+    # Twitter/X parameters
+    's', 't', 'twclid',
+    # Other common parameters
+    'share', 'action', 'feature', 'tracking', 'tracked', 'debug',
+    'dm_i', 'eh', 'sa', 'ved', 'ei', 'url', 'src', 'source_id', 'sourceid',
+    '_ke', 'hsctatracking', 'hash', '_branch_match_id'
+})
+
+# Matches one tracking parameter (with or without a value) in a raw query string
+_TRACKING_RE = re.compile(
+    r'(?:^|&)(?:' + '|'.join(map(re.escape, _TRACKING_PARAMS)) + r')(?:=[^&]*)?(?=&|$)',
+    re.IGNORECASE
+)
+
 async def fetch_url(session, url) -> str:
-    if not url or not isinstance(url, str):
-        logger.warning(f"Invalid URL provided: {url}")
-        return url
+    if url in _URL_CACHE:
+        return _URL_CACHE[url]
         
     try:
-        async with session.get(url, allow_redirects=True, timeout=30, headers=HEADERS) as response:
-            if response.status != 200:
-                logger.warning(f"Non-200 status code ({response.status}) for URL: {url}")
+        # Resolve redirects without downloading the body
+        async with session.head(url, allow_redirects=True) as response:
+            status = response.status
             final_url = str(response.url)
+        
+        # Some servers reject HEAD, retry with a minimal GET
+        if status in (403, 405):
+            async with session.get(url, allow_redirects=True, headers=RANGE_HEADERS) as response:
+                status = response.status
+                final_url = str(response.url)
+        
+        # 206 is the expected answer to the ranged GET
+        if status not in (200, 206):
+            logger.warning(f"Non-200 status code ({status}) for URL: {url}")
+        if logger.isEnabledFor(logging.DEBUG):
             logger.debug(f"Successfully fetched URL: {final_url}")
-            return final_url
+        _URL_CACHE[url] = final_url
+        return final_url
     except asyncio.TimeoutError:
         logger.error(f"Timeout while fetching URL: {url}")
         return url
@@ -69,189 +175,362 @@ def strip_tracking_params(url: str) -> str:
     if not url or not isinstance(url, str):
         return url
     
+    # Split off the fragment first, it may contain a '?' of its own
+    url_no_fragment, hash_mark, fragment = url.partition('#')
+    
+    # Nothing to strip without a query string
+    if '?' not in url_no_fragment:
+        return url.rstrip('/')
+    
+    base, _, query = url_no_fragment.partition('?')
+    
+    # Remove tracking parameters in a single sweep over the raw query
+    new_query = _TRACKING_RE.sub('', query).lstrip('&')
+    
+    # Nothing was removed, keep the original URL
+    if new_query == query:
+        return url.rstrip('/')
+    
+    # Rebuild the URL
+    clean_url = base
+    if new_query:
+        clean_url += '?' + new_query
+    clean_url += hash_mark + fragment
+    
+    # Remove trailing slashes for consistency
+    return clean_url.rstrip('/')
+
+def make_resolver() -> aiohttp.abc.AbstractResolver:
+    """Use the aiodns-backed resolver when available, else the threaded one"""
     try:
-        parsed = urlparse(url)
-        # Parse query parameters
-        query_dict = parse_qs(parsed.query, keep_blank_values=True)
-        
-        # Expanded list of tracking parameters to remove
-        tracking_params = {
-            # UTM parameters
-            'utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content',
-            # Social media
-            'fbclid', 'gclid', '_ga', 'ref', 'source', 'campaign', 'medium',
-            # Referral parameters
-            'ref_src', 'ref_url', 'ref_map', 'ref_type', 'ref_id', 'ref_content',
-            # Additional tracking
-            '_hsenc', '_hsmi', 'mc_cid', 'mc_eid', 'ml_subscriber', 'ml_subscriber_hash',
-            # Twitter/X parameters
-            's', 't', 'twclid',
-            # Other common parameters
-            'share', 'action', 'feature', 'tracking', 'tracked', 'debug',
-            'dm_i', 'eh', 'sa', 'ved', 'ei', 'url', 'src', 'source_id', 'sourceid',
-            '_ke', 'hsCtaTracking', 'hash', '_branch_match_id'
-        }
-        
-        # Remove tracking parameters
-        filtered_query = {
-            k: v for k, v in query_dict.items()
-            if k.lower() not in tracking_params
-        }
-        
-        # Rebuild the URL
-        new_query = urlencode(filtered_query, doseq=True)
-        clean_url = urlunparse((
-            parsed.scheme,
-            parsed.netloc,
-            parsed.path,
-            parsed.params,
-            new_query,
-            parsed.fragment
-        ))
-        
-        # Remove trailing slashes for consistency
-        return clean_url.rstrip('/')
-    except Exception as e:
-        logger.error(f"Error parsing URL {url}: {str(e)}")
-        return url
+        return aiohttp.AsyncResolver(nameservers=DNS_NAMESERVERS)
+    except RuntimeError:
+        # AsyncResolver requires the optional aiodns package
+        return aiohttp.ThreadedResolver()
+
+def make_session(connector: aiohttp.TCPConnector) -> aiohttp.ClientSession:
+    """Create the HTTP session, backed by the SQLite response cache when available"""
+    if CachedSession is None:
+        return aiohttp.ClientSession(connector=connector, headers=HEADERS, timeout=REQUEST_TIMEOUT)
+    
+    cache = SQLiteBackend(URL_CACHE_PATH, expire_after=URL_CACHE_EXPIRE_SECONDS)
+    return CachedSession(cache=cache, connector=connector, headers=HEADERS, timeout=REQUEST_TIMEOUT)
+
+async def get_session() -> aiohttp.ClientSession:
+    """
+    Return the shared HTTP session, creating it on first use
+    Reusing it keeps DNS entries and open connections warm between verifications
+    """
+    global _SESSION
+    if _SESSION is None or _SESSION.closed:
+        # Cap connections per host rather than globally so one slow host
+        # can't starve the others
+        connector = aiohttp.TCPConnector(
+            limit=0,
+            limit_per_host=8,
+            ttl_dns_cache=600,
+            use_dns_cache=True,
+            resolver=make_resolver()
+        )
+        _SESSION = make_session(connector)
+    return _SESSION
+
+async def close_session() -> None:
+    """Close the shared HTTP session, must run on the loop that created it"""
+    global _SESSION
+    if _SESSION is not None:
+        await _SESSION.close()
+        _SESSION = None
 
 async def verify_urls(short_urls: List[str], long_urls: List[str]) -> List[Tuple[str, str]]:
-    async with aiohttp.ClientSession() as session:
-        # Limit concurrent connections
-        connector = aiohttp.TCPConnector(limit=10)
-        async with aiohttp.ClientSession(connector=connector) as session:
-            # Process in batches of 50
-            batch_size = 50
-            results = []
-            
-            for i in range(0, len(short_urls), batch_size):
-                batch_short = short_urls[i:i + batch_size]
-                batch_long = long_urls[i:i + batch_size]
-                
-                short_tasks = [fetch_url(session, url) for url in batch_short if url.strip()]
-                long_tasks = [fetch_url(session, url) for url in batch_long if url.strip()]
-                
-                short_results = await asyncio.gather(*short_tasks)
-                long_results = await asyncio.gather(*long_tasks)
-                
-                results.extend(zip(
-                    [strip_tracking_params(url) for url in short_results],
-                    long_results
-                ))
-                
-                logger.info(f"Processed batch {i//batch_size + 1} ({len(results)}/{len(short_urls)} URLs)")
-            
-            return results
+    session = await get_session()
+    
+    # Start a new fetch as soon as a slot frees up instead of waiting
+    # for the slowest URL of a fixed batch
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_FETCHES)
+    
+    async def fetch_tagged(url: str) -> Tuple[str, str]:
+        async with semaphore:
+            return url, await fetch_url(session, url)
+    
+    # Fetch every distinct URL once, whichever column it appears in.
+    # Invalid URLs are filtered here so fetch_url doesn't have to check them
+    unique_urls = [
+        url for url in dict.fromkeys([*short_urls, *long_urls])
+        if isinstance(url, str) and url.strip()
+    ]
+    for url in set(short_urls).union(long_urls).difference(unique_urls):
+        logger.warning(f"Invalid URL provided: {url}")
+    tasks = [asyncio.create_task(fetch_tagged(url)) for url in unique_urls]
+    
+    resolved: Dict[str, str] = {}
+    for done, task in enumerate(asyncio.as_completed(tasks), 1):
+        url, final_url = await task
+        resolved[url] = final_url
+        
+        if done % PROGRESS_INTERVAL == 0 or done == len(tasks):
+            logger.info(f"Fetched {done}/{len(tasks)} unique URLs")
+    
+    # Scatter the results back, cleaning each distinct short URL once
+    # Invalid URLs were never fetched and are passed through unchanged
+    cleaned = {url: strip_tracking_params(resolved.get(url, url)) for url in set(short_urls)}
+    return [
+        (cleaned[short_url], resolved.get(long_url, long_url))
+        for short_url, long_url in zip(short_urls, long_urls)
+    ]
+
+async def run_verification(short_urls: List[str], long_urls: List[str]) -> List[Tuple[str, str]]:
+    """Verify URLs and release the shared session before the event loop exits"""
+    try:
+        return await verify_urls(short_urls, long_urls)
+    finally:
+        await close_session()
+
+def run_async(coro):
+    """Run a coroutine on the uvloop event loop when available"""
+    if uvloop is not None:
+        return uvloop.run(coro)
+    return asyncio.run(coro)
 
-def get_column_data(worksheet, column, start_row=1):
+def column_range(sheet_name, column, start_row=1):
     """
-    Get data from a specific column starting from start_row
+    Build the A1 range of a column starting from start_row
     column can be either a letter (A, B, C) or number (1, 2, 3)
     """
-    # Convert column letter to number if necessary
-    if isinstance(column, str):
-        column = ord(column.upper()) - ord('A') + 1
+    # Convert column number to letters if necessary (1 -> A, 27 -> AA)
+    if isinstance(column, int):
+        letters = ''
+        while column > 0:
+            column, remainder = divmod(column - 1, 26)
+            letters = chr(ord('A') + remainder) + letters
+        column = letters
     
-    # Get all values from the column
-    all_values = worksheet.col_values(column)
-    
-    # Return values starting from start_row (converting to 0-based index)
-    return all_values[start_row - 1:]
+    # Quote the sheet name, it may contain spaces
+    sheet_name = sheet_name.replace("'", "''")
+    return f"'{sheet_name}'!{column}{start_row}:{column}"
+
+def range_values(value_range: Dict[str, Any]) -> List[str]:
+    """Flatten a single-column value range into a list of cell values"""
+    # Empty cells come back as empty rows, missing 'values' means no data
+    return [row[0] if row else '' for row in value_range.get('values', [])]
 
 def normalize_url_path(path: str) -> str:
     """Normalize URL path by removing /cl/s and trailing slashes"""
-    # Remove trailing slashes
-    path = path.rstrip('/')
+    # Remove trailing slashes, skipping the copy when there are none
+    if path.endswith('/'):
+        path = path.rstrip('/')
     # Remove /cl/s pattern (common in shortened URLs)
-    if path.endswith('/cl/s'):
-        path = path[:-5]
-    return path
+    return path.removesuffix('/cl/s')
 
-def compare_urls(url1, url2):
+def split_url(url: str) -> Tuple[str, str]:
     """
-    Compare URLs by checking if they point to the same content
-    Returns tuple of (match_type, details)
+    Return the (netloc, path) of a URL, using ada-url when available
+    Both parsers yield the WHATWG form, with ;params dropped from the last
+    path segment as urllib.parse has always done
     """
-    parsed1 = urlparse(url1)
-    parsed2 = urlparse(url2)
-    
-    # Compare domains
-    if parsed1.netloc != parsed2.netloc:
-        return False, "Different domains"
-    
-    # Normalize and compare paths (ignoring case)
-    path1 = normalize_url_path(parsed1.path)
-    path2 = normalize_url_path(parsed2.path)
+    if ada_url is not None:
+        try:
+            parsed = ada_url.URL(url)
+            return parsed.host, strip_path_params(parsed.pathname)
+        except ValueError:
+            # Malformed for the WHATWG parser, retry with urllib.parse
+            pass
+    parsed = urlparse(url)
+    return fallback_host(parsed), fallback_path(parsed.path)
+
+def strip_path_params(path: str) -> str:
+    """Drop ;params from the last path segment, like urlparse does"""
+    index = path.find(';', max(path.rfind('/'), 0))
+    return path if index < 0 else path[:index]
+
+def fallback_host(parsed) -> str:
+    """
+    Build the host of a urlparse result the way ada-url reports it
+    Lowercased, punycoded, without credentials and without the scheme's default port
+    """
+    try:
+        port = parsed.port
+    except ValueError:
+        # Invalid port, keep the raw netloc
+        return parsed.netloc.lower()
     
-    if path1.lower() != path2.lower():
-        return False, "Different paths"
+    host = parsed.hostname or ''
+    if not host.isascii():
+        try:
+            host = host.encode('idna').decode('ascii')
+        except UnicodeError:
+            # Not a valid internationalized name, compare it as is
+            pass
+    if ':' in host:
+        # IPv6 literals keep their brackets
+        host = f'[{host}]'
+    if port is not None and port != DEFAULT_PORTS.get(parsed.scheme.lower()):
+        host += f':{port}'
+    return host
+
+def fallback_path(path: str) -> str:
+    """Percent-encode a urlparse path and resolve dot segments the way ada-url does"""
+    segments = []
+    parts = quote(path, safe=_PATH_SAFE_CHARS).split('/')
+    for segment in parts:
+        if segment.lower() in _SINGLE_DOT_SEGMENTS:
+            continue
+        if segment.lower() in _DOUBLE_DOT_SEGMENTS:
+            # Never pop the empty segment before the leading slash
+            if len(segments) > 1:
+                segments.pop()
+            continue
+        segments.append(segment)
     
-    return True, "URLs match"
+    # A trailing dot segment still leaves a trailing slash
+    if parts[-1].lower() in _SINGLE_DOT_SEGMENTS | _DOUBLE_DOT_SEGMENTS:
+        segments.append('')
+    return '/'.join(segments)
+
+def _canon(url: str) -> Tuple[str, str]:
+    """Parse a URL once into (netloc, normalized lowercase path)"""
+    netloc, path = split_url(url)
+    return netloc, normalize_url_path(path).lower()
 
-def load_sheet_data(gc, config: dict) -> pd.DataFrame:
+def spreadsheet_id(url: str) -> str:
+    """Extract the spreadsheet ID from a docs.google.com URL"""
+    return url.split('/d/', 1)[1].split('/', 1)[0]
+
+def make_sheets_session(filename: str) -> AuthorizedSession:
+    """Create an HTTP session authorized with the service account credentials"""
+    credentials = service_account.Credentials.from_service_account_file(
+        filename,
+        scopes=SHEETS_SCOPES
+    )
+    return AuthorizedSession(credentials)
+
+def parse_id(cell: str) -> Optional[int]:
+    """Return the cell as an integer ID, or None if it doesn't hold one"""
+    try:
+        return int(cell)
+    except ValueError:
+        return None
+
+def load_sheet_data(sheets_session: AuthorizedSession, config: dict) -> pd.DataFrame:
     """Load and prepare data from a single sheet"""
-    spreadsheet = gc.open_by_url(config['url'])
-    worksheet = spreadsheet.worksheet(config['sheet_name'])
+    # Read both columns in a single round trip, straight from the REST API
+    response = sheets_session.get(
+        SHEETS_BATCH_GET_URL.format(spreadsheet_id=spreadsheet_id(config['url'])),
+        params={'ranges': [
+            column_range(config['sheet_name'], config['id_column'], config['start_row']),
+            column_range(config['sheet_name'], config['url_column'], config['start_row'])
+        ]}
+    )
+    response.raise_for_status()
+    
+    id_range, url_range = json_loads(response.content)['valueRanges']
+    ids = range_values(id_range)
+    urls = range_values(url_range)
     
-    ids = get_column_data(worksheet, config['id_column'], config['start_row'])
-    urls = get_column_data(worksheet, config['url_column'], config['start_row'])
+    # Trailing empty cells are omitted, pad so both columns line up
+    length = max(len(ids), len(urls))
+    ids += [''] * (length - len(ids))
+    urls += [''] * (length - len(urls))
     
-    df = pd.DataFrame({
-        'id': pd.to_numeric(ids, errors='coerce'),
-        'url': urls
-    }).dropna()
+    # Keep only rows with an integer ID, casting directly instead of going
+    # through float NaNs. Strip URLs once here so fetch results stay aligned
+    # with their rows
+    pairs = [
+        (row_id, url.strip())
+        for row_id, url in zip(map(parse_id, ids), urls)
+        if row_id is not None
+    ]
+    df = pd.DataFrame(pairs, columns=['id', 'url']).astype({'id': 'int64'})
+    
+    return df.sort_values('id', kind='stable')
+
+def start_log_listener() -> QueueListener:
+    """Write queued log records to both file and console on a background thread"""
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [
+        logging.FileHandler(f'logs/google_sheets_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log'),
+        logging.StreamHandler()
+    ]
+    for handler in handlers:
+        handler.setFormatter(formatter)
     
-    return df.sort_values('id')
+    listener = QueueListener(log_queue, *handlers)
+    listener.start()
+    return listener
 
 def main():
+    listener = start_log_listener()
     try:
-        gc = gspread.service_account(filename='service_account.json')
+        sheets_session = make_sheets_session('service_account.json')
         
         # Load data from both sheets
         logger.info("Loading data from sheets...")
-        df1 = load_sheet_data(gc, SHEET_CONFIGS['sheet1'])
-        df2 = load_sheet_data(gc, SHEET_CONFIGS['sheet2'])
+        # Requests are blocking, so fetch both sheets in parallel threads
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            future1 = executor.submit(load_sheet_data, sheets_session, SHEET_CONFIGS['sheet1'])
+            future2 = executor.submit(load_sheet_data, sheets_session, SHEET_CONFIGS['sheet2'])
+            df1 = future1.result()
+            df2 = future2.result()
         
-        # Find common IDs and filter dataframes
-        common_ids = set(df1['id']).intersection(set(df2['id']))
-        if not common_ids:
+        # Join both sheets on ID, keeping only the common IDs sorted by ID
+        merged = df1.merge(df2, on='id', suffixes=('_1', '_2'), sort=True)
+        if merged.empty:
             logger.error("No common IDs found between sheets")
             return
-            
-        # Filter dataframes to only include common IDs
-        df1_filtered = df1[df1['id'].isin(common_ids)]
-        df2_filtered = df2[df2['id'].isin(common_ids)]
         
-        # Sort both dataframes by ID to ensure alignment
-        df1_filtered = df1_filtered.sort_values('id')
-        df2_filtered = df2_filtered.sort_values('id')
+        logger.info(f"Found {len(merged)} common IDs between sheets")
+        
+        # Skip if URL2 is from web.archive.org, before spending any fetches on the pair
+        archived = merged['url_2'].str.contains('web.archive.org', regex=False, na=False)
+        for archived_id in merged.loc[archived, 'id']:
+            logger.info(f"Skipping comparison for ID {archived_id} - web.archive.org URL")
+        to_verify = merged[~archived]
         
         # Get lists of URLs to verify
-        urls1 = df1_filtered['url'].tolist()
-        urls2 = df2_filtered['url'].tolist()
+        urls1 = to_verify['url_1'].tolist()
+        urls2 = to_verify['url_2'].tolist()
         
-        logger.info(f"Found {len(common_ids)} common IDs between sheets")
         logger.info("Starting URL verification...")
         
         # Run the async URL verification
-        results = asyncio.run(verify_urls(urls1, urls2))
+        results = run_async(run_verification(urls1, urls2))
+        
+        # Process results as columns instead of comparing row by row
+        res_df = pd.DataFrame(results, columns=['url1', 'url2'])
+        res_df['id'] = to_verify['id'].to_numpy()
+        
+        # URL2 may still redirect to web.archive.org
+        redirected = res_df['url2'].str.contains('web.archive.org', regex=False, na=False)
+        for archived_id in res_df.loc[redirected, 'id']:
+            logger.info(f"Skipping comparison for ID {archived_id} - web.archive.org URL")
+        compared = res_df[~redirected]
+        
+        # Parse each distinct resolved URL once, then compare whole columns.
+        # Netlocs and paths live in separate dicts so the mapped columns stay
+        # plain strings (and comparable) even when no rows are left
+        netlocs: Dict[str, str] = {}
+        paths: Dict[str, str] = {}
+        for url in set(compared['url1']).union(compared['url2']):
+            netlocs[url], paths[url] = _canon(url)
+        domain_mismatch = compared['url1'].map(netlocs) != compared['url2'].map(netlocs)
+        mismatch_mask = domain_mismatch | (compared['url1'].map(paths) != compared['url2'].map(paths))
         
-        # Process results
-        mismatches = []
-        for i, (verified_url1, verified_url2) in enumerate(results):
-            # Skip if URL2 is from web.archive.org
-            if 'web.archive.org' in verified_url2:
-                logger.info(f"Skipping comparison for ID {df1_filtered.iloc[i]['id']} - web.archive.org URL")
-                continue
-                
-            matches, details = compare_urls(verified_url1, verified_url2)
-            if not matches:
-                mismatches.append({
-                    'id': df1_filtered.iloc[i]['id'],
-                    'url1': verified_url1,
-                    'url2': verified_url2,
-                    'details': details
-                })
+        # Pull plain arrays once rather than building a row object per mismatch
+        mismatch_rows = compared[mismatch_mask]
+        mismatches = [
+            {
+                'id': mismatch_id,
+                'url1': url1,
+                'url2': url2,
+                'details': "Different domains" if different_domain else "Different paths"
+            }
+            for mismatch_id, url1, url2, different_domain in zip(
+                mismatch_rows['id'].to_numpy(),
+                mismatch_rows['url1'].to_numpy(),
+                mismatch_rows['url2'].to_numpy(),
+                domain_mismatch[mismatch_mask].to_numpy()
+            )
+        ]
         
         # Log results
         logger.info(f"Verification complete. Found {len(mismatches)} mismatches (excluding web.archive.org URLs)")
@@ -264,6 +543,9 @@ def main():
     except Exception as e:
         logger.error(f"Fatal error: {str(e)}")
         raise
+    finally:
+        # Flush whatever is still queued before exiting
+        listener.stop()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,57 @@
+import importlib.util
+import logging
+import os
+
+import pytest
+
+pd = pytest.importorskip('pandas')
+pytest.importorskip('aiohttp')
+pytest.importorskip('google.auth')
+
+spec = importlib.util.spec_from_file_location(
+    'google_sheets_main',
+    os.path.join(os.path.dirname(__file__), 'main.py')
+)
+main = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(main)
+
+
+class _Listener:
+    def stop(self):
+        pass
+
+
+def _run_main(monkeypatch, caplog, sheet1, sheet2, results):
+    frames = {'sheet1': sheet1, 'sheet2': sheet2}
+    monkeypatch.setattr(main, 'start_log_listener', _Listener)
+    monkeypatch.setattr(main, 'make_sheets_session', lambda filename: None)
+    monkeypatch.setattr(
+        main, 'load_sheet_data',
+        lambda session, config: frames[
+            next(name for name, c in main.SHEET_CONFIGS.items() if c is config)
+        ]
+    )
+
+    def fake_run_async(coro):
+        coro.close()
+        return results
+
+    monkeypatch.setattr(main, 'run_async', fake_run_async)
+    with caplog.at_level(logging.INFO):
+        main.main()
+    return caplog.text
+
+
+def test_all_archived_in_sheet(monkeypatch, caplog):
+    sheet1 = pd.DataFrame({'id': [1], 'url': ['https://example.com/a']})
+    sheet2 = pd.DataFrame({'id': [1], 'url': ['https://web.archive.org/web/1/https://example.com/a']})
+    text = _run_main(monkeypatch, caplog, sheet1, sheet2, [])
+    assert 'Found 0 mismatches' in text
+
+
+def test_all_archived_after_redirect(monkeypatch, caplog):
+    sheet1 = pd.DataFrame({'id': [1], 'url': ['https://example.com/a']})
+    sheet2 = pd.DataFrame({'id': [1], 'url': ['https://short.example/x']})
+    results = [('https://example.com/a', 'https://web.archive.org/web/1/https://example.com/a')]
+    text = _run_main(monkeypatch, caplog, sheet1, sheet2, results)
+    assert 'Found 0 mismatches' in text